@@ -1,23 +1,29 @@
 import logging
+import os
+import sys
+from collections import Counter
 from io import BytesIO
+from itertools import repeat
 from pathlib import Path, PurePath
-from typing import ClassVar, Dict, Iterable, List, Optional, Type, Union
+from types import MappingProxyType
+from typing import ClassVar, Dict, Iterable, List, Optional, Type, Union, cast
 
 from docling_core.types import BaseCell, BaseText
-from docling_core.types import BoundingBox as DsBoundingBox
 from docling_core.types import Document as DsDocument
 from docling_core.types import DocumentDescription as DsDocumentDescription
 from docling_core.types import FileInfoObject as DsFileInfoObject
 from docling_core.types import PageDimensions, PageReference, Prov, Ref
 from docling_core.types import Table as DsSchemaTable
 from docling_core.types import TableCell
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from docling.backend.abstract_backend import PdfDocumentBackend
 from docling.backend.pypdfium2_backend import PyPdfiumDocumentBackend
 from docling.datamodel.base_models import (
     AssembledUnit,
+    BoundingBox,
     ConversionStatus,
+    CoordOrigin,
     DocumentStream,
     FigureElement,
     Page,
@@ -29,26 +35,125 @@ from docling.utils.utils import create_file_hash
 
 _log = logging.getLogger(__name__)
 
-layout_label_to_ds_type = {
-    "Title": "title",
-    "Document Index": "table-of-path_or_stream",
-    "Section-header": "subtitle-level-1",
-    "Checkbox-Selected": "checkbox-selected",
-    "Checkbox-Unselected": "checkbox-unselected",
-    "Caption": "caption",
-    "Page-header": "page-header",
-    "Page-footer": "page-footer",
-    "Footnote": "footnote",
-    "Table": "table",
-    "Formula": "equation",
-    "List-item": "paragraph",
-    "Code": "paragraph",
-    "Picture": "figure",
-    "Text": "paragraph",
+# Interned keys, so lookups of labels interned by the layout model resolve by
+# identity. Only a read-only view is exported, lookups in the hot path go to the
+# dict itself.
+_layout_label_to_ds_type = {
+    sys.intern(k): sys.intern(v)
+    for k, v in {
+        "Title": "title",
+        "Document Index": "table-of-path_or_stream",
+        "Section-header": "subtitle-level-1",
+        "Checkbox-Selected": "checkbox-selected",
+        "Checkbox-Unselected": "checkbox-unselected",
+        "Caption": "caption",
+        "Page-header": "page-header",
+        "Page-footer": "page-footer",
+        "Footnote": "footnote",
+        "Table": "table",
+        "Formula": "equation",
+        "List-item": "paragraph",
+        "Code": "paragraph",
+        "Picture": "figure",
+        "Text": "paragraph",
+    }.items()
 }
+layout_label_to_ds_type = MappingProxyType(_layout_label_to_ds_type)
+
+
+def _bboxes_to_bottom_left(
+    bboxes: Iterable[BoundingBox], page_heights: Iterable[float]
+) -> List[List[float]]:
+    """Convert bboxes to bottom-left origin coordinate lists.
+
+    Equivalent to [bbox.to_bottom_left_origin(h).as_tuple() for bbox, h in ...],
+    without creating an intermediate BoundingBox per bbox.
+    """
+    return [
+        (
+            [b.l, h - b.b, b.r, h - b.t]
+            if b.coord_origin == CoordOrigin.TOPLEFT
+            else [b.l, b.b, b.r, b.t]
+        )
+        for b, h in zip(bboxes, page_heights)
+    ]
+
+
+def _make_empty_table_cell(i: int, j: int) -> TableCell:
+    return TableCell.model_construct(
+        text="",
+        # bbox=[0,0,0,0],
+        spans=[[i, j]],
+        obj_type="body",
+    )
+
+
+def _build_table_data(
+    element: TableElement, page_height: float
+) -> List[List[TableCell]]:
+    """Build the DS table data grid of a table element, in bottom-left origin."""
+    num_rows = element.num_rows
+    num_cols = element.num_cols
+    cells = element.table_cells
+
+    table_data: List[List[Optional[TableCell]]] = [
+        [None] * num_cols for _ in range(num_rows)
+    ]
+
+    cell_bboxes = _bboxes_to_bottom_left(
+        [cell.bbox for cell in cells], repeat(page_height)
+    )
+
+    # Row and column ranges of each cell, clamped once to the table grid.
+    cell_ranges = [
+        (
+            max(0, min(cell.start_row_offset_idx, num_rows)),
+            max(0, min(cell.end_row_offset_idx, num_rows)),
+            max(0, min(cell.start_col_offset_idx, num_cols)),
+            max(0, min(cell.end_col_offset_idx, num_cols)),
+        )
+        for cell in cells
+    ]
+
+    # Place cells in table data for which there is actual cell content.
+    for cell, cell_bbox, (r0, r1, c0, c1) in zip(cells, cell_bboxes, cell_ranges):
+        celltype = "body"
+        if cell.column_header:
+            celltype = "col_header"
+        elif cell.row_header:
+            celltype = "row_header"
+
+        # Spans and bbox are the same for every grid position the cell covers. The
+        # lists are shared between those positions, rather than copied per position.
+        spans = [[ri, cj] for ri in range(r0, r1) for cj in range(c0, c1)]
+
+        for i in range(r0, r1):
+            for j in range(c0, c1):
+                table_data[i][j] = TableCell.model_construct(
+                    text=cell.text,
+                    bbox=cell_bbox,
+                    # col=j,
+                    # row=i,
+                    spans=spans,
+                    obj_type=celltype,
+                    # col_span=[cell.start_col_offset_idx, cell.end_col_offset_idx],
+                    # row_span=[cell.start_row_offset_idx, cell.end_row_offset_idx]
+                )
+
+    # Fill the remaining grid positions, without actual cell content, with empty cells.
+    # Building new rows narrows them to TableCell for the type checker.
+    return [
+        [
+            cell if cell is not None else _make_empty_table_cell(i, j)
+            for j, cell in enumerate(row)
+        ]
+        for i, row in enumerate(table_data)
+    ]
 
 
 class InputDocument(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, extra="forbid")
+
     file: PurePath = None
     document_hash: Optional[str] = None
     valid: bool = False
@@ -73,27 +178,39 @@ class InputDocument(BaseModel):
         try:
             if isinstance(path_or_stream, Path):
                 self.file = path_or_stream
-                self.filesize = path_or_stream.stat().st_size
-                if self.filesize > self.limits.max_file_size:
+                filesize = path_or_stream.stat().st_size
+                self.filesize = filesize
+
+                if filesize > self.limits.max_file_size:
                     self.valid = False
                 else:
-                    self.document_hash = create_file_hash(path_or_stream)
                     self._backend = pdf_backend(path_or_stream=path_or_stream)
 
             elif isinstance(path_or_stream, BytesIO):
                 self.file = PurePath(filename)
-                self.filesize = path_or_stream.getbuffer().nbytes
+                # Determine the size without exporting a buffer view of the stream.
+                pos = path_or_stream.tell()
+                filesize = path_or_stream.seek(0, os.SEEK_END)
+                path_or_stream.seek(pos)
+                self.filesize = filesize
 
-                if self.filesize > self.limits.max_file_size:
+                if filesize > self.limits.max_file_size:
                     self.valid = False
                 else:
-                    self.document_hash = create_file_hash(path_or_stream)
                     self._backend = pdf_backend(path_or_stream=path_or_stream)
 
-            if self.document_hash and self._backend.page_count() > 0:
-                self.page_count = self._backend.page_count()
-
-                if self.page_count <= self.limits.max_num_pages:
+            # Opening the backend only parses the document structure, so the page
+            # limit is checked before the file is hashed in full.
+            page_count = self._backend.page_count() if self._backend else 0
+            if page_count > 0:
+                self.page_count = page_count
+
+                if page_count <= self.limits.max_num_pages:
+                    if isinstance(path_or_stream, BytesIO):
+                        # The backend reads the stream, hash it from where the caller
+                        # left it.
+                        path_or_stream.seek(pos)
+                    self.document_hash = create_file_hash(path_or_stream)
                     self.valid = True
 
         except (FileNotFoundError, OSError) as e:
@@ -107,9 +224,16 @@ class InputDocument(BaseModel):
                 exc_info=e,
             )
             # raise
+        finally:
+            if not self.valid and self._backend is not None:
+                # Release the PDF of rejected or failed documents right away.
+                self._backend.unload()
+                self._backend = None
 
 
 class ConvertedDocument(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, extra="forbid")
+
     input: InputDocument
 
     status: ConversionStatus = ConversionStatus.PENDING  # failure, success
@@ -136,142 +260,120 @@ class ConvertedDocument(BaseModel):
             page_hashes=page_hashes,
         )
 
-        main_text = []
-        tables = []
-        figures = []
+        elements = self.assembled.elements
 
-        page_no_to_page = {p.page_no: p for p in self.pages}
+        # Output sizes are known upfront, every element yields one main_text entry.
+        # Counted on the exact type, like the dispatch below. The handlers overwrite
+        # every None placeholder, hence the casts to the final list types.
+        num_by_type = Counter(map(type, elements))
+        main_text = cast(List[Union[Ref, BaseText]], [None] * len(elements))
+        tables = cast(List[DsSchemaTable], [None] * num_by_type[TableElement])
+        figures = cast(List[BaseCell], [None] * num_by_type[FigureElement])
+        table_index = 0
+        figure_index = 0
 
-        for element in self.assembled.elements:
-            # Convert bboxes to lower-left origin.
-            target_bbox = DsBoundingBox(
-                element.cluster.bbox.to_bottom_left_origin(
-                    page_no_to_page[element.page_no].size.height
-                ).as_tuple()
-            )
+        get_ds_type = _layout_label_to_ds_type.get
+
+        # Keyed by page_no, so elements on pages which are not part of the document
+        # fail with a KeyError.
+        page_height = {p.page_no: p.size.height for p in self.pages}
+
+        # Convert bboxes to lower-left origin.
+        element_bboxes = _bboxes_to_bottom_left(
+            [element.cluster.bbox for element in elements],
+            [page_height[element.page_no] for element in elements],
+        )
 
-            if isinstance(element, TextElement):
-                main_text.append(
-                    BaseText(
-                        text=element.text,
-                        obj_type=layout_label_to_ds_type.get(element.label),
-                        name=element.label,
-                        prov=[
-                            Prov(
-                                bbox=target_bbox,
-                                page=element.page_no,
-                                span=[0, len(element.text)],
-                            )
-                        ],
+        def add_text(
+            k: int, element: TextElement, ds_type: str, target_bbox: List[float]
+        ):
+            label = element.label
+            main_text[k] = BaseText.model_construct(
+                text=element.text,
+                obj_type=ds_type,
+                name=label,
+                prov=[
+                    Prov.model_construct(
+                        bbox=target_bbox,
+                        page=element.page_no,
+                        span=[0, len(element.text)],
                     )
-                )
-            elif isinstance(element, TableElement):
-                index = len(tables)
-                ref_str = f"#/tables/{index}"
-                main_text.append(
-                    Ref(
-                        name=element.label,
-                        obj_type=layout_label_to_ds_type.get(element.label),
-                        ref=ref_str,
-                    ),
-                )
+                ],
+            )
+
+        def add_table(
+            k: int, element: TableElement, ds_type: str, target_bbox: List[float]
+        ):
+            nonlocal table_index
+
+            page_no = element.page_no
+            h = page_height[page_no]
+            label = element.label
+
+            ref_str = f"#/tables/{table_index}"
+            main_text[k] = Ref.model_construct(
+                name=label,
+                obj_type=ds_type,
+                ref=ref_str,
+            )
 
-                # Initialise empty table data grid (only empty cells)
-                table_data = [
-                    [
-                        TableCell(
-                            text="",
-                            # bbox=[0,0,0,0],
-                            spans=[[i, j]],
-                            obj_type="body",
-                        )
-                        for j in range(element.num_cols)
-                    ]
-                    for i in range(element.num_rows)
-                ]
-
-                # Overwrite cells in table data for which there is actual cell content.
-                for cell in element.table_cells:
-                    for i in range(
-                        min(cell.start_row_offset_idx, element.num_rows),
-                        min(cell.end_row_offset_idx, element.num_rows),
-                    ):
-                        for j in range(
-                            min(cell.start_col_offset_idx, element.num_cols),
-                            min(cell.end_col_offset_idx, element.num_cols),
-                        ):
-                            celltype = "body"
-                            if cell.column_header:
-                                celltype = "col_header"
-                            elif cell.row_header:
-                                celltype = "row_header"
-
-                            def make_spans(cell):
-                                for rspan in range(
-                                    min(cell.start_row_offset_idx, element.num_rows),
-                                    min(cell.end_row_offset_idx, element.num_rows),
-                                ):
-                                    for cspan in range(
-                                        min(
-                                            cell.start_col_offset_idx, element.num_cols
-                                        ),
-                                        min(cell.end_col_offset_idx, element.num_cols),
-                                    ):
-                                        yield [rspan, cspan]
-
-                            spans = list(make_spans(cell))
-                            table_data[i][j] = TableCell(
-                                text=cell.text,
-                                bbox=cell.bbox.to_bottom_left_origin(
-                                    page_no_to_page[element.page_no].size.height
-                                ).as_tuple(),
-                                # col=j,
-                                # row=i,
-                                spans=spans,
-                                obj_type=celltype,
-                                # col_span=[cell.start_col_offset_idx, cell.end_col_offset_idx],
-                                # row_span=[cell.start_row_offset_idx, cell.end_row_offset_idx]
-                            )
-
-                tables.append(
-                    DsSchemaTable(
-                        num_cols=element.num_cols,
-                        num_rows=element.num_rows,
-                        obj_type=layout_label_to_ds_type.get(element.label),
-                        data=table_data,
-                        prov=[
-                            Prov(
-                                bbox=target_bbox,
-                                page=element.page_no,
-                                span=[0, 0],
-                            )
-                        ],
+            tables[table_index] = DsSchemaTable.model_construct(
+                num_cols=element.num_cols,
+                num_rows=element.num_rows,
+                obj_type=ds_type,
+                data=_build_table_data(element, h),
+                prov=[
+                    Prov.model_construct(
+                        bbox=target_bbox,
+                        page=page_no,
+                        span=[0, 0],
                     )
-                )
+                ],
+            )
+            table_index += 1
 
-            elif isinstance(element, FigureElement):
-                index = len(figures)
-                ref_str = f"#/figures/{index}"
-                main_text.append(
-                    Ref(
-                        name=element.label,
-                        obj_type=layout_label_to_ds_type.get(element.label),
-                        ref=ref_str,
-                    ),
-                )
-                figures.append(
-                    BaseCell(
-                        prov=[
-                            Prov(
-                                bbox=target_bbox,
-                                page=element.page_no,
-                                span=[0, 0],
-                            )
-                        ],
-                        obj_type=layout_label_to_ds_type.get(element.label),
-                        # data=[[]],
+        def add_figure(
+            k: int, element: FigureElement, ds_type: str, target_bbox: List[float]
+        ):
+            nonlocal figure_index
+
+            label = element.label
+
+            ref_str = f"#/figures/{figure_index}"
+            main_text[k] = Ref.model_construct(
+                name=label,
+                obj_type=ds_type,
+                ref=ref_str,
+            )
+            figures[figure_index] = BaseCell.model_construct(
+                prov=[
+                    Prov.model_construct(
+                        bbox=target_bbox,
+                        page=element.page_no,
+                        span=[0, 0],
                     )
+                ],
+                obj_type=ds_type,
+                # data=[[]],
+            )
+            figure_index += 1
+
+        # Dispatch on the exact element type, a single dict lookup per element.
+        add_element = {
+            TextElement: add_text,
+            TableElement: add_table,
+            FigureElement: add_figure,
+        }
+
+        for k, (element, target_bbox) in enumerate(zip(elements, element_bboxes)):
+            ds_type = get_ds_type(element.label)
+            if ds_type is None:
+                # The DS models are built without validation, so reject labels
+                # without a DS type here.
+                raise ValueError(
+                    f"No DS type defined for layout label {element.label!r}"
                 )
+            add_element[type(element)](k, element, ds_type, target_bbox)
 
         page_dimensions = [
             PageDimensions(page=p.page_no, height=p.size.height, width=p.size.width)
@@ -304,6 +406,7 @@ class ConvertedDocument(BaseModel):
 
 
 class DocumentConversionInput(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True, extra="forbid")
 
     _path_or_stream_iterator: Iterable[Union[Path, DocumentStream]] = None
     limits: Optional[DocumentLimits] = DocumentLimits()
@@ -1,6 +1,7 @@
 import copy
 import logging
 import random
+import sys
 import time
 from typing import Iterable, List
 
@@ -262,7 +263,7 @@ class LayoutModel:
             for ix, pred_item in enumerate(self.layout_predictor.predict(page.image)):
                 cluster = Cluster(
                     id=ix,
-                    label=pred_item["label"],
+                    label=sys.intern(pred_item["label"]),
                     confidence=pred_item["confidence"],
                     bbox=BoundingBox.model_validate(pred_item),
                     cells=[],
@@ -1,4 +1,5 @@
 import hashlib
+import mmap
 from io import BytesIO
 from itertools import islice
 from pathlib import Path
@@ -27,9 +28,22 @@ def create_file_hash(path_or_stream: Union[BytesIO, Path]) -> str:
 
     if isinstance(path_or_stream, Path):
         with path_or_stream.open("rb") as afile:
-            _hash_buf(afile)
+            try:
+                # Hash straight from the page cache instead of copying in chunks.
+                mm = mmap.mmap(afile.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):  # empty or non-mappable files
+                _hash_buf(afile)
+            else:
+                with mm:
+                    if hasattr(mmap, "MADV_SEQUENTIAL"):
+                        mm.madvise(mmap.MADV_SEQUENTIAL)
+                    hasher.update(mm)
     elif isinstance(path_or_stream, BytesIO):
-        _hash_buf(path_or_stream)
+        # Hash the underlying buffer from the current position on, without copying
+        # it in chunks. Unlike reading, this leaves the stream position untouched.
+        with path_or_stream.getbuffer() as buf:
+            with buf[path_or_stream.tell() :] as remainder:
+                hasher.update(remainder)
 
     return hasher.hexdigest()
 
@@ -0,0 +1,190 @@
+from pathlib import Path
+
+import pytest
+
+from docling.datamodel.base_models import (
+    AssembledUnit,
+    BoundingBox,
+    Cluster,
+    FigureElement,
+    Page,
+    PageSize,
+    TableCell,
+    TableElement,
+    TextElement,
+)
+from docling.datamodel.document import (
+    ConvertedDocument,
+    InputDocument,
+    _build_table_data,
+)
+
+PAGE_HEIGHT = 800.0
+
+
+@pytest.fixture
+def test_doc_path():
+    return Path("./data/2206.01062.pdf")
+
+
+def _cluster(label):
+    return Cluster(id=0, label=label, bbox=BoundingBox(l=10, t=20, r=110, b=70))
+
+
+def _table_cell(r0, r1, c0, c1, text, **kwargs):
+    # Same dict format as produced by the table structure model.
+    return TableCell.model_validate(
+        dict(
+            bbox=dict(l=c0, t=r0, r=c1, b=r1, token=text),
+            row_span=r1 - r0,
+            col_span=c1 - c0,
+            start_row_offset_idx=r0,
+            end_row_offset_idx=r1,
+            start_col_offset_idx=c0,
+            end_col_offset_idx=c1,
+            **kwargs,
+        )
+    )
+
+
+def _table_element(num_rows, num_cols, table_cells):
+    return TableElement(
+        label="Table",
+        id=0,
+        page_no=1,
+        cluster=_cluster("Table"),
+        otsl_seq=[],
+        num_rows=num_rows,
+        num_cols=num_cols,
+        table_cells=table_cells,
+    )
+
+
+def _grid(table_data):
+    return [[(c.text, c.obj_type, c.spans) for c in row] for row in table_data]
+
+
+def _converted_doc(test_doc_path, elements):
+    pages = [
+        Page(page_no=1, page_hash="hash", size=PageSize(width=600, height=PAGE_HEIGHT))
+    ]
+    return ConvertedDocument(
+        input=InputDocument(path_or_stream=test_doc_path),
+        pages=pages,
+        assembled=AssembledUnit(elements=elements, body=elements, headers=[]),
+    )
+
+
+@pytest.mark.parametrize(
+    "element",
+    [
+        TextElement(
+            label="Bogus", id=0, page_no=1, cluster=_cluster("Bogus"), text="text"
+        ),
+        TableElement(
+            label="Bogus",
+            id=0,
+            page_no=1,
+            cluster=_cluster("Bogus"),
+            otsl_seq=[],
+            table_cells=[],
+        ),
+        FigureElement(label="Bogus", id=0, page_no=1, cluster=_cluster("Bogus")),
+    ],
+)
+def test_unknown_label(test_doc_path, element):
+    conv_doc = _converted_doc(test_doc_path, [element])
+
+    with pytest.raises(ValueError, match="Bogus"):
+        conv_doc.to_ds_document()
+
+
+def test_table_data_merged_and_header_cells():
+    element = _table_element(
+        3,
+        3,
+        [
+            _table_cell(0, 1, 0, 2, "header", column_header=True),
+            _table_cell(1, 3, 0, 1, "rowhead", row_header=True),
+            _table_cell(1, 2, 1, 2, "body"),
+        ],
+    )
+    table_data = _build_table_data(element, PAGE_HEIGHT)
+
+    header_spans = [[0, 0], [0, 1]]
+    rowhead_spans = [[1, 0], [2, 0]]
+    assert _grid(table_data) == [
+        [
+            ("header", "col_header", header_spans),
+            ("header", "col_header", header_spans),
+            ("", "body", [[0, 2]]),
+        ],
+        [
+            ("rowhead", "row_header", rowhead_spans),
+            ("body", "body", [[1, 1]]),
+            ("", "body", [[1, 2]]),
+        ],
+        [
+            ("rowhead", "row_header", rowhead_spans),
+            ("", "body", [[2, 1]]),
+            ("", "body", [[2, 2]]),
+        ],
+    ]
+
+    # Bboxes are converted to bottom-left origin, empty cells have none.
+    assert table_data[0][1].bbox == [0, PAGE_HEIGHT - 1, 2, PAGE_HEIGHT - 0]
+    assert table_data[0][2].bbox is None
+
+
+def test_table_data_cells_past_grid():
+    element = _table_element(2, 2, [_table_cell(1, 5, 1, 4, "overflow")])
+    table_data = _build_table_data(element, PAGE_HEIGHT)
+
+    assert _grid(table_data) == [
+        [("", "body", [[0, 0]]), ("", "body", [[0, 1]])],
+        [("", "body", [[1, 0]]), ("overflow", "body", [[1, 1]])],
+    ]
+
+
+def test_table_data_overlapping_cells():
+    # Overlapping cells span the full grid area, but leave the second row empty.
+    element = _table_element(
+        2, 2, [_table_cell(0, 1, 0, 2, "first"), _table_cell(0, 1, 0, 2, "second")]
+    )
+    table_data = _build_table_data(element, PAGE_HEIGHT)
+
+    spans = [[0, 0], [0, 1]]
+    assert _grid(table_data) == [
+        [("second", "body", spans), ("second", "body", spans)],
+        [("", "body", [[1, 0]]), ("", "body", [[1, 1]])],
+    ]
+
+
+def test_table_data_empty_table():
+    assert _build_table_data(_table_element(0, 0, []), PAGE_HEIGHT) == []
+
+
+def test_element_on_missing_page(test_doc_path):
+    element = TextElement(
+        label="Text", id=0, page_no=2, cluster=_cluster("Text"), text="text"
+    )
+    conv_doc = _converted_doc(test_doc_path, [element])
+
+    with pytest.raises(KeyError):
+        conv_doc.to_ds_document()
+
+
+def test_table_data_negative_offsets():
+    # Negative start offsets are clamped to 0 instead of indexing from the end.
+    element = _table_element(
+        3,
+        3,
+        [_table_cell(-1, 1, 2, 3, "row"), _table_cell(2, 3, -2, 1, "col")],
+    )
+    table_data = _build_table_data(element, PAGE_HEIGHT)
+
+    assert _grid(table_data) == [
+        [("", "body", [[0, 0]]), ("", "body", [[0, 1]]), ("row", "body", [[0, 2]])],
+        [("", "body", [[1, 0]]), ("", "body", [[1, 1]]), ("", "body", [[1, 2]])],
+        [("col", "body", [[2, 0]]), ("", "body", [[2, 1]]), ("", "body", [[2, 2]])],
+    ]
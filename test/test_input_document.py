@@ -0,0 +1,85 @@
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+import docling.datamodel.document as document_module
+from docling.datamodel.document import DocumentConversionInput, InputDocument
+from docling.datamodel.settings import DocumentLimits
+from docling.utils.utils import create_file_hash
+
+
+@pytest.fixture
+def test_doc_path():
+    return Path("./data/2206.01062.pdf")
+
+
+def _input_doc(test_doc_path, as_stream, **kwargs):
+    if as_stream:
+        return InputDocument(
+            path_or_stream=BytesIO(test_doc_path.read_bytes()),
+            filename=test_doc_path.name,
+            **kwargs,
+        )
+    return InputDocument(path_or_stream=test_doc_path, **kwargs)
+
+
+@pytest.mark.parametrize("as_stream", [False, True])
+def test_valid_document(test_doc_path, as_stream):
+    in_doc = _input_doc(test_doc_path, as_stream)
+
+    assert in_doc.valid
+    assert in_doc.page_count == 9
+    assert in_doc.document_hash == create_file_hash(test_doc_path)
+    assert in_doc._backend is not None
+
+    in_doc._backend.unload()
+
+
+@pytest.mark.parametrize("as_stream", [False, True])
+def test_max_num_pages(test_doc_path, as_stream):
+    in_doc = _input_doc(
+        test_doc_path, as_stream, limits=DocumentLimits(max_num_pages=5)
+    )
+
+    assert not in_doc.valid
+    assert in_doc.page_count == 9
+    assert in_doc.document_hash is None  # rejected documents are not hashed
+    assert in_doc._backend is None
+
+
+@pytest.mark.parametrize("as_stream", [False, True])
+def test_max_file_size(test_doc_path, as_stream):
+    in_doc = _input_doc(
+        test_doc_path, as_stream, limits=DocumentLimits(max_file_size=10)
+    )
+
+    assert not in_doc.valid
+    assert in_doc.page_count is None
+    assert in_doc.document_hash is None
+    assert in_doc._backend is None
+
+
+@pytest.mark.parametrize("as_stream", [False, True])
+def test_hash_error_releases_backend(test_doc_path, as_stream, monkeypatch):
+    def failing_hash(path_or_stream):
+        raise OSError("cannot read")
+
+    monkeypatch.setattr(document_module, "create_file_hash", failing_hash)
+    in_doc = _input_doc(test_doc_path, as_stream)
+
+    assert not in_doc.valid
+    assert in_doc.document_hash is None
+    assert in_doc._backend is None
+
+
+def test_docs_limits(test_doc_path):
+    doc_input = DocumentConversionInput.from_paths(
+        [test_doc_path], limits=DocumentLimits(max_num_pages=5)
+    )
+    (in_doc,) = doc_input.docs()
+
+    assert not in_doc.valid
+    assert in_doc.page_count == 9
+    assert in_doc.document_hash is None
+    assert in_doc._backend is None
@@ -0,0 +1,44 @@
+import hashlib
+from io import BytesIO
+from pathlib import Path
+
+import pytest
+
+from docling.utils.utils import create_file_hash
+
+
+@pytest.fixture
+def test_doc_path():
+    return Path("./data/2206.01062.pdf")
+
+
+def test_file_hash_path(test_doc_path):
+    ref = hashlib.sha256(test_doc_path.read_bytes()).hexdigest()
+
+    assert create_file_hash(test_doc_path) == ref
+
+
+def test_file_hash_empty_path(tmp_path):
+    empty_path = tmp_path / "empty.pdf"
+    empty_path.write_bytes(b"")
+    ref = hashlib.sha256(b"").hexdigest()
+
+    assert create_file_hash(empty_path) == ref
+
+
+def test_file_hash_stream(test_doc_path):
+    data = test_doc_path.read_bytes()
+    stream = BytesIO(data)
+
+    assert create_file_hash(stream) == create_file_hash(test_doc_path)
+    assert stream.tell() == 0
+
+
+def test_file_hash_stream_from_position(test_doc_path):
+    data = test_doc_path.read_bytes()
+    stream = BytesIO(data)
+    stream.seek(5)
+
+    # Only the remainder of the stream is hashed, as when reading it.
+    assert create_file_hash(stream) == hashlib.sha256(data[5:]).hexdigest()
+    assert stream.tell() == 5